@@ -1,6 +1,12 @@
 from ordered_list import *
 from huffman_bit_writer import *
 from huffman_bit_reader import *
+from concurrent.futures import ProcessPoolExecutor
+import os
+import struct
+import zlib
+
+CHECKSUM_MAGIC = b'HCRC'  # marks the end of a block checksum trailer
 
 
 class HuffmanNode:
@@ -103,12 +109,14 @@ def create_header(freqs):
     return header.rstrip()
 
 
-def huffman_encode(in_file, out_file):
+def huffman_encode(in_file, out_file, block_size=None):
     '''Takes inout file name and output file name as parameters - both files will have .txt extensions
     Uses the Huffman coding process on the text from the input file and writes encoded text to output file
     Also creates a second output file which adds _compressed before the .txt extension to the name of the file.
     This second file is actually compressed by writing individual 0 and 1 bits to the file using the utility methods 
-    provided in the huffman_bits_io module to write both the header and bits.'''
+    provided in the huffman_bits_io module to write both the header and bits.
+    If block_size is given, the text is split into blocks of that many characters and a trailer holding
+    the CRC32 of each block is appended to the compressed file so it can be checked with verify()'''
     try:
         with open(in_file, 'r') as file:
             text = file.read()
@@ -120,9 +128,15 @@ def huffman_encode(in_file, out_file):
     huffman_array = create_code(node)
     header = create_header(char_freq)
 
+    if block_size is not None and (type(block_size) != int or block_size <= 0):
+        raise ValueError("block_size must be a positive int")
+
     encoded = ''
-    for character in text:
-        encoded += huffman_array[ord(character)]
+    blocks = []
+    for i in range(len(text)):
+        if block_size is not None and i % block_size == 0:
+            blocks.append((len(encoded), i))
+        encoded += huffman_array[ord(text[i])]
 
     output = open(out_file, 'w')
     if header != '':
@@ -135,12 +149,158 @@ def huffman_encode(in_file, out_file):
 
     bit_object = HuffmanBitWriter(c_file)
     bit_object.write_str(header)
-    if header != '':
+    if header != '' or block_size is not None:  # an empty header must not run into the trailer
         bit_object.write_str("\n")
     bit_object.write_code(encoded)
     bit_object.close()
     file.close()
 
+    if block_size is not None:
+        trailer = ''
+        for i in range(len(blocks)):
+            start_bit, char_start = blocks[i]
+            end_bit = blocks[i + 1][0] if i + 1 < len(blocks) else len(encoded)
+            block_text = text[char_start:char_start + block_size]
+            trailer += "%d %d %d %d\n" % (start_bit, end_bit - start_bit, len(block_text),
+                                          zlib.crc32(block_text.encode('latin-1')))
+        write_checksums(c_file, header + "\n", trailer)
+
+
+def write_checksums(c_file, header, trailer):
+    '''Appends the block checksum trailer to a compressed file. Each line of the trailer is
+    "start_bit num_bits num_chars crc32" and the file ends with the trailer length, the CRC32
+    of the trailer, the CRC32 of the header line and CHECKSUM_MAGIC'''
+    data = trailer.encode('utf-8')
+    with open(c_file, 'ab') as file:
+        file.write(data)
+        file.write(struct.pack('>III', len(data), zlib.crc32(data), zlib.crc32(header.encode('utf-8'))))
+        file.write(CHECKSUM_MAGIC)
+
+
+def read_checksums(c_file):
+    '''Reads the block checksum trailer from a compressed file
+    Returns a list of (start_bit, num_bits, num_chars, crc32) tuples, one per block
+    Raises ValueError if the file was written without block checksums, or if the header or trailer is corrupt'''
+    with open(c_file, 'rb') as file:
+        header = file.readline()
+        file.seek(0, 2)
+        size = file.tell()
+        if size < len(header) + 16:
+            raise ValueError(c_file + " has no block checksums")
+        file.seek(size - 16)
+        length, trailer_crc, header_crc, magic = struct.unpack('>III4s', file.read(16))
+        if magic != CHECKSUM_MAGIC:
+            raise ValueError(c_file + " has no block checksums")
+        if length > size - 16 - len(header):
+            raise ValueError(c_file + " has a corrupt checksum trailer")
+        file.seek(size - 16 - length)
+        data = file.read(length)
+    if zlib.crc32(data) != trailer_crc:
+        raise ValueError(c_file + " has a corrupt checksum trailer")
+    if zlib.crc32(header) != header_crc:
+        raise ValueError(c_file + " has a corrupt header")
+
+    payload_bits = (size - 16 - length - len(header)) * 8
+    blocks = []
+    end_bit = 0
+    for line in data.decode('utf-8').splitlines():
+        values = line.split()
+        if len(values) != 4 or not all(value.isdigit() for value in values):
+            raise ValueError(c_file + " has a malformed checksum trailer line: " + repr(line))
+        start_bit, num_bits, num_chars, crc = [int(value) for value in values]
+        if start_bit != end_bit or start_bit + num_bits > payload_bits or num_chars == 0 or crc > 0xFFFFFFFF:
+            raise ValueError(c_file + " has a checksum trailer entry outside the payload: " + repr(line))
+        end_bit = start_bit + num_bits
+        blocks.append((start_bit, num_bits, num_chars, crc))
+    if payload_bits - end_bit >= 8:  # the blocks must cover every byte of the payload
+        raise ValueError(c_file + " has a checksum trailer that does not cover the payload")
+    return blocks
+
+
+verify_root = None  # Huffman tree of the file being verified, built once per worker process
+
+
+def init_verify_worker(header):
+    '''Builds the Huffman tree for verify_blocks() once when a worker process starts'''
+    global verify_root
+    verify_root = create_huff_tree(parse_header(header))
+
+
+def verify_blocks(encoded_file, blocks):
+    '''Decodes a contiguous run of blocks of a compressed file into CRC32s without keeping the decoded text
+    Returns a list holding True for each block whose checksum matches the one recorded for it'''
+    root = verify_root
+    if root is None:  # the header lists no characters, so no block can decode
+        return [False] * len(blocks)
+    if root.left is None and root.right is None:  # a single character is stored without any bits
+        return [num_bits == 0 and zlib.crc32(bytes([root.char]) * num_chars) == crc
+                for start_bit, num_bits, num_chars, crc in blocks]
+
+    results = []
+    bit_object = HuffmanBitReader(encoded_file)
+    try:
+        bit_object.read_str()
+        bit_object.file.seek(blocks[0][0] // 8, 1)
+        for _ in range(blocks[0][0] % 8):
+            bit_object.read_bit()
+        for start_bit, num_bits, num_chars, crc in blocks:
+            node = root
+            chars = bytearray()
+            for _ in range(num_bits):
+                if bit_object.read_bit():
+                    node = node.right
+                else:
+                    node = node.left
+                if node.left is None and node.right is None:
+                    chars.append(node.char)
+                    node = root
+            results.append(node is root and len(chars) == num_chars and zlib.crc32(chars) == crc)
+    except struct.error:  # ran out of bytes before the blocks ended
+        results += [False] * (len(blocks) - len(results))
+    finally:
+        bit_object.close()
+    return results
+
+
+def verify(encoded_file, max_workers=None):
+    '''Checks a compressed file written with block checksums without writing any decoded output
+    Blocks are decoded in parallel across max_workers processes, each taking contiguous runs of blocks
+    Returns a list of the byte offsets (into the compressed file) of every block whose checksum
+    does not match - an empty list means the file is intact
+    Raises ValueError if the header or the checksum trailer is corrupt'''
+    try:
+        with open(encoded_file, 'rb') as file:
+            header = file.readline()
+    except FileNotFoundError:
+        raise FileNotFoundError
+
+    blocks = read_checksums(encoded_file)
+    try:
+        header_str = header.decode('utf-8')
+        num_c = total(header_str)
+        parse_header(header_str)
+    except (ValueError, IndexError):
+        raise ValueError(encoded_file + " has a corrupt header")
+    if sum(block[2] for block in blocks) != num_c:
+        raise ValueError(encoded_file + " has a corrupt header")
+    if not blocks:
+        return []
+
+    workers = max_workers or os.cpu_count() or 1
+    chunk_size = -(-len(blocks) // (workers * 4))
+    chunks = [blocks[i:i + chunk_size] for i in range(0, len(blocks), chunk_size)]
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_verify_worker,
+                             initargs=(header_str,)) as executor:
+        results = []
+        for chunk_results in executor.map(verify_blocks, [encoded_file] * len(chunks), chunks):
+            results += chunk_results
+
+    failed = []
+    for block, ok in zip(blocks, results):
+        if not ok:
+            failed.append(len(header) + block[0] // 8)
+    return failed
+
 
 def huffman_decode(encoded_file, decode_file):
     try:
@@ -1,6 +1,9 @@
 import unittest
 import filecmp
 import subprocess
+import os
+import shutil
+import tempfile
 from ordered_list import *
 from huffman import *
 
@@ -185,6 +188,108 @@ class TestList(unittest.TestCase):
         err = subprocess.call("diff -wb declaration.txt declaration_decoded.txt", shell=True)
         self.assertEqual(err, 0)
 
+    def make_tmp_dir(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        return tmp_dir
+
+    def flip_byte(self, src, dst, offset):
+        f = open(src, 'rb')
+        data = bytearray(f.read())
+        f.close()
+        data[offset] ^= 0x10
+        f = open(dst, 'wb')
+        f.write(data)
+        f.close()
+
+    def test_verify(self):
+        tmp_dir = self.make_tmp_dir()
+        out = os.path.join(tmp_dir, "declaration_out.txt")
+        compressed = os.path.join(tmp_dir, "declaration_out_compressed.txt")
+        decoded = os.path.join(tmp_dir, "declaration_decoded.txt")
+        huffman_encode("declaration.txt", out, 500)
+        self.assertEqual(verify(compressed), [])
+        huffman_decode(compressed, decoded)
+        err = subprocess.call("diff -wb declaration.txt " + decoded, shell=True)
+        self.assertEqual(err, 0)
+
+    def test_verify_corrupt(self):  # a flipped byte is reported for the block it lands in only
+        tmp_dir = self.make_tmp_dir()
+        compressed = os.path.join(tmp_dir, "declaration_out_compressed.txt")
+        bad = os.path.join(tmp_dir, "declaration_bad_compressed.txt")
+        huffman_encode("declaration.txt", os.path.join(tmp_dir, "declaration_out.txt"), 500)
+        f = open(compressed, 'rb')
+        header_len = len(f.readline())
+        f.close()
+        blocks = read_checksums(compressed)
+        self.assertGreater(len(blocks), 2)
+        for start_bit, num_bits, num_chars, crc in [blocks[0], blocks[len(blocks) // 2], blocks[-1]]:
+            # the byte holding the middle bit of the block only holds bits of that block
+            self.flip_byte(compressed, bad, header_len + (start_bit + num_bits // 2) // 8)
+            self.assertEqual(verify(bad), [header_len + start_bit // 8])
+
+    def test_verify_corrupt_trailer(self):
+        tmp_dir = self.make_tmp_dir()
+        compressed = os.path.join(tmp_dir, "declaration_out_compressed.txt")
+        bad = os.path.join(tmp_dir, "declaration_bad_compressed.txt")
+        huffman_encode("declaration.txt", os.path.join(tmp_dir, "declaration_out.txt"), 500)
+        size = os.path.getsize(compressed)
+        self.flip_byte(compressed, bad, size - 20)  # trailer body
+        with self.assertRaises(ValueError):
+            verify(bad)
+        for offset in range(size - 16, size):  # footer: length, trailer CRC, header CRC and magic
+            self.flip_byte(compressed, bad, offset)
+            with self.assertRaises(ValueError):
+                verify(bad)
+
+    def test_verify_corrupt_header(self):  # header changes that still parse must be caught
+        tmp_dir = self.make_tmp_dir()
+        compressed = os.path.join(tmp_dir, "declaration_out_compressed.txt")
+        bad = os.path.join(tmp_dir, "declaration_bad_compressed.txt")
+        huffman_encode("declaration.txt", os.path.join(tmp_dir, "declaration_out.txt"), 500)
+        f = open(compressed, 'rb')
+        data = f.read()
+        f.close()
+        self.assertTrue(data.startswith(b"10 166 "))
+        for replacement in [b"10 164 ", b"11 166 "]:
+            f = open(bad, 'wb')
+            f.write(replacement + data[len(replacement):])
+            f.close()
+            with self.assertRaises(ValueError):
+                verify(bad)
+
+    def test_verify_empty(self):  # an empty header must not swallow the trailer
+        tmp_dir = self.make_tmp_dir()
+        empty = os.path.join(tmp_dir, "empty.txt")
+        compressed = os.path.join(tmp_dir, "empty_out_compressed.txt")
+        decoded = os.path.join(tmp_dir, "empty_decoded.txt")
+        open(empty, 'w').close()
+        huffman_encode(empty, os.path.join(tmp_dir, "empty_out.txt"), 4)
+        self.assertEqual(verify(compressed), [])
+        huffman_decode(compressed, decoded)
+        f = open(decoded, 'r')
+        self.assertEqual(f.read(), '')
+        f.close()
+
+    def test_verify_1character(self):
+        tmp_dir = self.make_tmp_dir()
+        huffman_encode('1space.txt', os.path.join(tmp_dir, '1space_out.txt'), 2)
+        self.assertEqual(verify(os.path.join(tmp_dir, '1space_out_compressed.txt')), [])
+
+    def test_encode_bad_block_size(self):
+        tmp_dir = self.make_tmp_dir()
+        for block_size in [0, -1, 2.5]:
+            with self.assertRaises(ValueError):
+                huffman_encode('declaration.txt', os.path.join(tmp_dir, 'declaration_out.txt'), block_size)
+
+    def test_verify_no_checksums(self):
+        with self.assertRaises(ValueError):
+            verify("declaration_compressed_soln.txt")
+
+    def test_verify_error(self):
+        with self.assertRaises(FileNotFoundError):
+            verify('nofile.txt')
+
     def compare_freq_counts(self, freq, exp):
         for i in range(256):
             stu = 'Frequency for ASCII ' + str(i) + ': ' + str(freq[i])